@@ -42,7 +42,8 @@ async def get_current_user(
             detail="User not found",
         )
     
-    return UserInDB(**user)
+    # model_construct — trusted DB source
+    return UserInDB.model_construct(**user)
 
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def signup(user_data: UserCreate):
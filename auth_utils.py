@@ -3,7 +3,9 @@ Authentication utilities for JWT tokens and password hashing
 """
 
 import os
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -11,8 +13,19 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Argon2 cost settings; defaults match passlib's. Lower them for test/dev runs only
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "102400"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "8"))
+
 # Password hashing with Argon2 (more secure and no 72-byte limit)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -40,13 +53,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the email"""
+@lru_cache(maxsize=1024)
+def _decode_token(token: str) -> Optional[tuple]:
+    """Signature check + claim parse, cached per raw token; expiry is checked by the caller"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
     except JWTError:
         return None
+    exp = payload.get("exp")
+    if exp is not None and not isinstance(exp, (int, float)):
+        return None
+    return payload.get("sub"), exp
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the email"""
+    claims = _decode_token(token)
+    if claims is None:
+        return None
+    email, exp = claims
+    # Checked on every call so a cached token still stops working once it expires
+    if exp is not None and time.time() > exp:
+        return None
+    return email
@@ -3,16 +3,18 @@ Database connection and utilities for MongoDB Atlas
 """
 
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "kvitta")
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
 
 class Database:
-    client: AsyncIOMotorClient = None
+    client: AsyncMongoClient = None
     
 db = Database()
 
@@ -22,12 +24,27 @@ async def get_database():
 
 async def connect_to_mongo():
     """Connect to MongoDB Atlas"""
-    db.client = AsyncIOMotorClient(MONGODB_URI)
+    # Native asyncio driver - no thread-pool hop per query as with Motor.
+    # One client per process, reused by every request; keep warm connections so
+    # requests don't pay TCP/TLS/auth setup
+    db.client = AsyncMongoClient(
+        MONGODB_URI,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+    )
     print("Connected to MongoDB Atlas")
 
+async def ensure_indexes():
+    """Create the indexes the routes rely on (no-op when they already exist)"""
+    database = await get_database()
+    # Membership filter ({"members.email": ...}) in list_groups
+    await database.groups.create_index([("members.email", 1)])
+    # Per-folder receipt counts and unsets in list_folders / update_folder / delete_folder
+    await database.groups.create_index([("folder_id", 1)])
+
 async def close_mongo_connection():
     """Close MongoDB connection"""
-    db.client.close()
+    await db.client.close()
     print("Closed MongoDB connection")
 
 async def get_users_collection():
@@ -44,7 +44,8 @@ async def create_folder(
     result = await folders_collection.insert_one(folder)
     folder["_id"] = result.inserted_id
 
-    return FolderResponse(**serialize_folder(folder))
+    # model_construct — trusted DB source
+    return FolderResponse.model_construct(**serialize_folder(folder))
 
 
 @router.get("", response_model=List[FolderResponse])
@@ -60,7 +61,8 @@ async def list_folders(current_user: UserInDB = Depends(get_current_user)):
         count = await groups_collection.count_documents({"folder_id": folder_id})
         folder["receipt_count"] = count
 
-    return [FolderResponse(**serialize_folder(folder)) for folder in folders]
+    # model_construct — trusted DB source
+    return [FolderResponse.model_construct(**serialize_folder(folder)) for folder in folders]
 
 
 @router.delete("/{folder_id}")
@@ -68,10 +70,11 @@ async def delete_folder(folder_id: str, current_user: UserInDB = Depends(get_cur
     folders_collection = await get_folders_collection()
     groups_collection = await get_groups_collection()
 
-    try:
-        folder = await folders_collection.find_one({"_id": ObjectId(folder_id)})
-    except Exception:
+    if not ObjectId.is_valid(folder_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid folder id")
+    oid = ObjectId(folder_id)
+
+    folder = await folders_collection.find_one({"_id": oid})
 
     if not folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found")
@@ -86,7 +89,7 @@ async def delete_folder(folder_id: str, current_user: UserInDB = Depends(get_cur
         {"folder_id": folder_id}, {"$unset": {"folder_id": ""}, "$set": {"updated_at": datetime.utcnow()}}
     )
 
-    await folders_collection.delete_one({"_id": ObjectId(folder_id)})
+    await folders_collection.delete_one({"_id": oid})
 
     return {"message": "Folder deleted"}
 
@@ -97,10 +100,11 @@ async def update_folder(
 ):
     folders_collection = await get_folders_collection()
 
-    try:
-        folder = await folders_collection.find_one({"_id": ObjectId(folder_id)})
-    except Exception:
+    if not ObjectId.is_valid(folder_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid folder id")
+    oid = ObjectId(folder_id)
+
+    folder = await folders_collection.find_one({"_id": oid})
 
     if not folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found")
@@ -112,13 +116,14 @@ async def update_folder(
 
     now = datetime.utcnow()
     await folders_collection.update_one(
-        {"_id": ObjectId(folder_id)},
+        {"_id": oid},
         {"$set": {"name": folder_data.name, "color": folder_data.color, "updated_at": now}},
     )
 
-    updated_folder = await folders_collection.find_one({"_id": ObjectId(folder_id)})
+    updated_folder = await folders_collection.find_one({"_id": oid})
     groups_collection = await get_groups_collection()
     count = await groups_collection.count_documents({"folder_id": folder_id})
     updated_folder["receipt_count"] = count
 
-    return FolderResponse(**serialize_folder(updated_folder))
+    # model_construct — trusted DB source
+    return FolderResponse.model_construct(**serialize_folder(updated_folder))
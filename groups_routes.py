@@ -5,7 +5,7 @@ Group expense room routes
 from datetime import datetime
 from typing import List
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from models import (
     GroupCreate,
     GroupResponse,
@@ -23,6 +23,18 @@ ROLE_ADMIN = "admin"
 ROLE_MEMBER = "member"
 
 
+# Only the fields serialize_group reads; keeps any other group data off the wire
+GROUP_RESPONSE_PROJECTION = {
+    "name": 1,
+    "description": 1,
+    "created_by": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "members": 1,
+    "folder_id": 1,
+}
+
+
 def serialize_group(group: dict) -> dict:
     return {
         "id": str(group["_id"]),
@@ -36,6 +48,30 @@ def serialize_group(group: dict) -> dict:
     }
 
 
+def group_response(group: dict) -> GroupResponse:
+    # model_construct — trusted DB source
+    data = serialize_group(group)
+    data["members"] = [GroupMember.model_construct(**member) for member in data["members"]]
+    return GroupResponse.model_construct(**data)
+
+
+def group_etag(group: dict) -> str:
+    # Every write to a group bumps updated_at, so id + updated_at identifies the representation
+    return f'W/"{group["_id"]}-{group["updated_at"].isoformat()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check: weak comparison over the comma-separated list, '*' matches anything"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
 def find_member(members: List[dict], email: str) -> dict | None:
     for member in members:
         if member["email"] == email:
@@ -78,32 +114,43 @@ async def create_group(group_data: GroupCreate, current_user: UserInDB = Depends
     result = await groups_collection.insert_one(group_doc)
     group_doc["_id"] = result.inserted_id
 
-    return GroupResponse(**serialize_group(group_doc))
+    return group_response(group_doc)
 
 
 @router.get("", response_model=List[GroupResponse])
 async def list_groups(current_user: UserInDB = Depends(get_current_user)):
     groups_collection = await get_groups_collection()
 
-    cursor = groups_collection.find({"members.email": current_user.email})
+    cursor = groups_collection.find({"members.email": current_user.email}, GROUP_RESPONSE_PROJECTION)
     groups = await cursor.to_list(length=100)
 
-    return [GroupResponse(**serialize_group(group)) for group in groups]
+    return [group_response(group) for group in groups]
 
 
 @router.get("/{group_id}", response_model=GroupResponse)
-async def get_group(group_id: str, current_user: UserInDB = Depends(get_current_user)):
+async def get_group(
+    group_id: str,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    current_user: UserInDB = Depends(get_current_user),
+):
     groups_collection = await get_groups_collection()
 
-    try:
-        group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    except Exception:
+    if not ObjectId.is_valid(group_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group id")
+    oid = ObjectId(group_id)
+
+    group = await groups_collection.find_one({"_id": oid}, GROUP_RESPONSE_PROJECTION)
 
     if not group or not find_member(group["members"], current_user.email):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
 
-    return GroupResponse(**serialize_group(group))
+    etag = group_etag(group)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return group_response(group)
 
 
 @router.post("/{group_id}/members", response_model=GroupResponse)
@@ -115,10 +162,11 @@ async def add_member(
     groups_collection = await get_groups_collection()
     users_collection = await get_users_collection()
 
-    try:
-        group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    except Exception:
+    if not ObjectId.is_valid(group_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group id")
+    oid = ObjectId(group_id)
+
+    group = await groups_collection.find_one({"_id": oid})
 
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
@@ -141,15 +189,15 @@ async def add_member(
     }
 
     await groups_collection.update_one(
-        {"_id": ObjectId(group_id)},
+        {"_id": oid},
         {
             "$push": {"members": new_member},
             "$set": {"updated_at": now},
         },
     )
 
-    updated_group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    return GroupResponse(**serialize_group(updated_group))
+    updated_group = await groups_collection.find_one({"_id": oid})
+    return group_response(updated_group)
 
 
 @router.patch("/{group_id}/members/{member_email}", response_model=GroupResponse)
@@ -161,10 +209,11 @@ async def update_member_role(
 ):
     groups_collection = await get_groups_collection()
 
-    try:
-        group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    except Exception:
+    if not ObjectId.is_valid(group_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group id")
+    oid = ObjectId(group_id)
+
+    group = await groups_collection.find_one({"_id": oid})
 
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
@@ -185,7 +234,7 @@ async def update_member_role(
 
     now = datetime.utcnow()
     await groups_collection.update_one(
-        {"_id": ObjectId(group_id), "members.email": member_email},
+        {"_id": oid, "members.email": member_email},
         {
             "$set": {
                 "members.$.role": payload.role,
@@ -194,18 +243,19 @@ async def update_member_role(
         },
     )
 
-    updated_group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    return GroupResponse(**serialize_group(updated_group))
+    updated_group = await groups_collection.find_one({"_id": oid})
+    return group_response(updated_group)
 
 
 @router.post("/{group_id}/leave")
 async def leave_group(group_id: str, current_user: UserInDB = Depends(get_current_user)):
     groups_collection = await get_groups_collection()
 
-    try:
-        group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    except Exception:
+    if not ObjectId.is_valid(group_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group id")
+    oid = ObjectId(group_id)
+
+    group = await groups_collection.find_one({"_id": oid})
 
     if not group or not find_member(group["members"], current_user.email):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
@@ -221,7 +271,7 @@ async def leave_group(group_id: str, current_user: UserInDB = Depends(get_curren
 
     now = datetime.utcnow()
     await groups_collection.update_one(
-        {"_id": ObjectId(group_id)},
+        {"_id": oid},
         {
             "$pull": {"members": {"email": current_user.email}},
             "$set": {"updated_at": now},
@@ -230,12 +280,12 @@ async def leave_group(group_id: str, current_user: UserInDB = Depends(get_curren
 
     # If creator left and there is another admin, transfer created_by
     if group["created_by"] == current_user.email:
-        updated_group = await groups_collection.find_one({"_id": ObjectId(group_id)})
+        updated_group = await groups_collection.find_one({"_id": oid})
         if updated_group and updated_group["members"]:
             new_admin = next((m for m in updated_group["members"] if m["role"] == ROLE_ADMIN), None)
             if new_admin:
                 await groups_collection.update_one(
-                    {"_id": ObjectId(group_id)},
+                    {"_id": oid},
                     {"$set": {"created_by": new_admin["email"], "updated_at": now}},
                 )
 
@@ -246,10 +296,11 @@ async def leave_group(group_id: str, current_user: UserInDB = Depends(get_curren
 async def delete_group(group_id: str, current_user: UserInDB = Depends(get_current_user)):
     groups_collection = await get_groups_collection()
 
-    try:
-        group = await groups_collection.find_one({"_id": ObjectId(group_id)})
-    except Exception:
+    if not ObjectId.is_valid(group_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group id")
+    oid = ObjectId(group_id)
+
+    group = await groups_collection.find_one({"_id": oid})
 
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
@@ -257,6 +308,6 @@ async def delete_group(group_id: str, current_user: UserInDB = Depends(get_curre
     # Only admins can delete the group
     ensure_admin(group["members"], current_user.email)
 
-    await groups_collection.delete_one({"_id": ObjectId(group_id)})
+    await groups_collection.delete_one({"_id": oid})
 
     return {"message": "Group deleted"}
@@ -1,25 +1,29 @@
+import asyncio
 import os
+import re
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from openai import OpenAI
 import pytesseract
 import cv2
 import numpy as np
-import base64
+import pybase64
 from ocr.llama import call_nvidia_llama_vision
+from ocr.http_client import close_http_client
+from ocr.images import encode_image_for_upload
 
 # Import auth routes and database
 from auth_routes import router as auth_router
 from groups_routes import router as groups_router
 from folders_routes import router as folders_router
 from receipts_routes import router as receipts_router
-from database import connect_to_mongo, close_mongo_connection
+from database import connect_to_mongo, close_mongo_connection, ensure_indexes
 from ocr.mistral_routes import router as mistral_router
 
-app = FastAPI(title="Kvitta API")
+app = FastAPI(title="Kvitta API", default_response_class=ORJSONResponse)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -40,12 +44,18 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await ensure_indexes()
 
 # Shutdown event: Close MongoDB connection
 @app.on_event("shutdown")
 async def shutdown_db_client():
     await close_mongo_connection()
 
+# Shutdown event: Close pooled OCR/LLM HTTP connections
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await close_http_client()
+
 # Include authentication routes
 app.include_router(auth_router)
 # Include groups routes
@@ -302,11 +312,13 @@ def split_card(card_img):
 # ---------- ENCODER ----------
 def encode_image(img):
     _, buffer = cv2.imencode(".png", img)
-    return base64.b64encode(buffer).decode("utf-8")
+    return pybase64.b64encode_as_string(buffer)
 
 
 import json as json_lib
 
+_JSON_BLOCK_RE = re.compile(r'```(?:json)?\s*\n(.*?)\n```', re.DOTALL)
+
 def extract_json_from_response(response_str: str) -> Optional[Dict]:
     """
     Extract JSON from LLM response which may contain markdown formatting.
@@ -325,8 +337,7 @@ def extract_json_from_response(response_str: str) -> Optional[Dict]:
         pass
     
     # Try to find ```json...``` block
-    import re
-    match = re.search(r'```(?:json)?\s*\n(.*?)\n```', response_str, re.DOTALL)
+    match = _JSON_BLOCK_RE.search(response_str)
     if match:
         try:
             return json_lib.loads(match.group(1))
@@ -402,18 +413,21 @@ async def upload_image(
         }
         for item in all_results
     ]
-    response:str = str(call_nvidia_llama_vision(None, PROMPT_ITEMS + ONTARIO_HST_RULES + str(results_for_llm)))
-    response_json = extract_json_from_response(response)
-
     charges_images_base64 = None
     if charges_image is not None:
         charges_bytes = await charges_image.read()
         charges_mime_type = charges_image.content_type or "image/jpeg"
-        charges_base64 = base64.b64encode(charges_bytes).decode("utf-8")
-        charges_images_base64 = [(charges_mime_type, charges_base64)]
-
-    response2:str = str(call_nvidia_llama_vision(charges_images_base64, PROMPT_CHARGES + str(results_for_llm)))
-    response2_json = extract_json_from_response(response2)
+        charges_images_base64 = [
+            await asyncio.to_thread(encode_image_for_upload, charges_bytes, charges_mime_type)
+        ]
+
+    # Items and charges prompts are independent - send both at once
+    response, response2 = await asyncio.gather(
+        call_nvidia_llama_vision(None, str(results_for_llm), system_prompt=PROMPT_ITEMS + ONTARIO_HST_RULES),
+        call_nvidia_llama_vision(charges_images_base64, PROMPT_CHARGES + str(results_for_llm)),
+    )
+    response_json = extract_json_from_response(str(response))
+    response2_json = extract_json_from_response(str(response2))
 
     return {
         "total_items_processed": len(all_results),
@@ -1,7 +1,15 @@
-import base64
+import asyncio
 import os
-from typing import Dict, List
-import requests
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+from fastapi import HTTPException as FastAPIHTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from ocr.http_client import http_client, post_json
+from ocr.images import encode_image_for_upload
+from ocr.instructions import PROMPT_TEMPLATE_VERSION
+from ocr.llm_cache import llm_cache, make_cache_key
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
@@ -9,16 +17,17 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 if not GEMINI_API_KEY:
     print("WARNING: GEMINI_API_KEY environment variable not set - Gemini OCR will not work")
 
-def _gemini_generate_content(parts: List[Dict], temperature: float = 0.6, max_output_tokens: int = 4096) -> str:
-    from fastapi import HTTPException as FastAPIHTTPException
+GEMINI_BASE_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}"
+GEMINI_GENERATE_URL = f"{GEMINI_BASE_URL}:generateContent?key={GEMINI_API_KEY}"
+GEMINI_STREAM_URL = f"{GEMINI_BASE_URL}:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
 
-    if not GEMINI_API_KEY:
-        raise FastAPIHTTPException(
-            status_code=500,
-            detail="GEMINI_API_KEY not configured on server"
-        )
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+def _gemini_payload(
+    parts: List[Dict],
+    temperature: float,
+    max_output_tokens: int,
+    system_instruction: Optional[str]
+) -> Dict:
     payload = {
         "contents": [
             {
@@ -31,23 +40,55 @@ def _gemini_generate_content(parts: List[Dict], temperature: float = 0.6, max_ou
             "maxOutputTokens": max_output_tokens
         }
     }
+    if system_instruction:
+        # Constant prompts go first as the system instruction so the provider can
+        # reuse its cached prefix; only the OCR text varies per request
+        payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+    return payload
+
+
+def _candidate_text(data: Dict) -> str:
+    candidates = data.get("candidates", [])
+    if not candidates:
+        return ""
+
+    content = candidates[0].get("content", {})
+    parts_out = content.get("parts", [])
+    return "".join(part.get("text", "") for part in parts_out if isinstance(part, dict))
+
+
+async def _gemini_generate_content(
+    parts: List[Dict],
+    temperature: float = 0.6,
+    max_output_tokens: int = 4096,
+    system_instruction: Optional[str] = None
+) -> str:
+    if not GEMINI_API_KEY:
+        raise FastAPIHTTPException(
+            status_code=500,
+            detail="GEMINI_API_KEY not configured on server"
+        )
+
+    cache_key = make_cache_key(
+        GEMINI_MODEL, PROMPT_TEMPLATE_VERSION, temperature, max_output_tokens, system_instruction, parts
+    )
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    payload = _gemini_payload(parts, temperature, max_output_tokens, system_instruction)
 
     try:
-        response = requests.post(url, json=payload, timeout=120)
+        response = await post_json(GEMINI_GENERATE_URL, payload)
         if response.status_code != 200:
             raise FastAPIHTTPException(
                 status_code=500,
                 detail=f"Gemini API request failed: {response.text}"
             )
 
-        data = response.json()
-        candidates = data.get("candidates", [])
-        if not candidates:
-            return ""
-
-        content = candidates[0].get("content", {})
-        parts_out = content.get("parts", [])
-        return "".join(part.get("text", "") for part in parts_out if isinstance(part, dict))
+        text = _candidate_text(orjson.loads(response.content))
+        llm_cache.set(cache_key, text)
+        return text
     except FastAPIHTTPException:
         raise
     except Exception as e:
@@ -57,7 +98,67 @@ def _gemini_generate_content(parts: List[Dict], temperature: float = 0.6, max_ou
         )
 
 
-def _gemini_extract_text_from_image(image_bytes: bytes, mime_type: str) -> str:
+
+async def _gemini_stream_content(
+    parts: List[Dict],
+    temperature: float = 0.6,
+    max_output_tokens: int = 4096,
+    system_instruction: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Yield generated text chunks from Gemini's SSE endpoint as they arrive."""
+    if not GEMINI_API_KEY:
+        raise FastAPIHTTPException(
+            status_code=500,
+            detail="GEMINI_API_KEY not configured on server"
+        )
+
+    payload = _gemini_payload(parts, temperature, max_output_tokens, system_instruction)
+    async with http_client.stream(
+        "POST",
+        GEMINI_STREAM_URL,
+        content=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+    ) as response:
+        if response.status_code != 200:
+            error_body = await response.aread()
+            raise FastAPIHTTPException(
+                status_code=500,
+                detail=f"Gemini API request failed: {error_body.decode(errors='replace')}"
+            )
+
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            text = _candidate_text(orjson.loads(line[5:]))
+            if text:
+                yield text
+
+
+async def _gemini_stream_events(
+    response_body: Dict,
+    analysis_requests: Dict[str, tuple[str, str]],
+    temperature: float,
+    max_output_tokens: int
+) -> AsyncIterator[bytes]:
+    """NDJSON events: OCR text first, then analysis deltas, then a final done/error line."""
+    yield orjson.dumps({"type": "ocr", **response_body}) + b"\n"
+    try:
+        for key, (text, prompt) in analysis_requests.items():
+            async for delta in _gemini_stream_content(
+                [{"text": text}],
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                system_instruction=prompt
+            ):
+                yield orjson.dumps({"type": key, "delta": delta}) + b"\n"
+    except Exception as e:
+        # Headers are already sent, so report failures in-band
+        detail = e.detail if isinstance(e, FastAPIHTTPException) else str(e)
+        yield orjson.dumps({"type": "error", "detail": detail}) + b"\n"
+        return
+    yield orjson.dumps({"type": "done"}) + b"\n"
+
+async def _gemini_extract_text_from_image(image_base64: str, mime_type: str) -> str:
     prompt = (
         "Extract all visible text from this image. "
         "Return text only and preserve line breaks where possible."
@@ -67,11 +168,20 @@ def _gemini_extract_text_from_image(image_bytes: bytes, mime_type: str) -> str:
         {
             "inlineData": {
                 "mimeType": mime_type,
-                "data": base64.b64encode(image_bytes).decode("utf-8")
+                "data": image_base64
             }
         }
     ]
-    return _gemini_generate_content(parts, temperature=0.0, max_output_tokens=2048)
+    return await _gemini_generate_content(parts, temperature=0.0, max_output_tokens=2048)
+
+
+async def _gemini_ocr_upload(upload: UploadFile) -> str:
+    image_data = await upload.read()
+    # Resize + base64 are CPU-bound on multi-MB photos; keep them off the event loop
+    mime_type, image_base64 = await asyncio.to_thread(
+        encode_image_for_upload, image_data, upload.content_type or "image/jpeg"
+    )
+    return await _gemini_extract_text_from_image(image_base64, mime_type)
 
 @app.post("/gemini-ocr/extract-text")
 async def extract_text_gemini(
@@ -79,12 +189,17 @@ async def extract_text_gemini(
     charges_image: Optional[UploadFile] = File(None),
     run_llm: bool = True,
     llm_temperature: float = 0.6,
-    llm_max_tokens: int = 4096
+    llm_max_tokens: int = 4096,
+    stream: bool = False
 ):
     """
     Extract text from receipt using Gemini and run PROMPT_ITEMS / PROMPT_CHARGES.
 
     Input/Output format mirrors /nvidia-ocr/extract-text.
+
+    With stream=true the response is NDJSON instead: an "ocr" event carrying the
+    fields above, then "items_analysis" / "charges_analysis" events with text
+    deltas as Gemini generates them, then "done" (or "error").
     """
     if not GEMINI_API_KEY:
         raise HTTPException(
@@ -99,15 +214,11 @@ async def extract_text_gemini(
         )
 
     try:
-        items_texts = []
-        for item_image in items_images:
-            image_data = await item_image.read()
-            mime_type = item_image.content_type or "image/jpeg"
-            items_texts.append(_gemini_extract_text_from_image(image_data, mime_type))
-
-        charges_data = await charges_image.read()
-        charges_mime = charges_image.content_type or "image/jpeg"
-        charges_text = _gemini_extract_text_from_image(charges_data, charges_mime)
+        # Read, encode and OCR every image concurrently; the charges image rides along in the same batch
+        *items_texts, charges_text = await asyncio.gather(
+            *(_gemini_ocr_upload(item_image) for item_image in items_images),
+            _gemini_ocr_upload(charges_image),
+        )
 
         full_items_text = "\n\n".join(items_texts)
         full_text = f"ITEMS:\n{full_items_text}\n\nCHARGES:\n{charges_text}"
@@ -119,27 +230,35 @@ async def extract_text_gemini(
             "charges_text": charges_text,
         }
 
+        analysis_requests = {}
         if run_llm and full_items_text.strip():
-            items_response = _gemini_generate_content(
-                [{"text": f"{PROMPT_ITEMS}\n{full_items_text}"}],
-                temperature=llm_temperature,
-                max_output_tokens=llm_max_tokens
-            )
-            response_body["items_analysis"] = {
-                "response": items_response
-            }
+            analysis_requests["items_analysis"] = (full_items_text, PROMPT_ITEMS)
 
         if run_llm and charges_text.strip():
-            charges_response = _gemini_generate_content(
-                [{"text": f"{PROMPT_CHARGES}\n{charges_text}"}],
+            analysis_requests["charges_analysis"] = (charges_text, PROMPT_CHARGES)
+
+        if stream:
+            return StreamingResponse(
+                _gemini_stream_events(response_body, analysis_requests, llm_temperature, llm_max_tokens),
+                media_type="application/x-ndjson"
+            )
+
+        # Items and charges analyses are independent, so run them together
+        analysis_responses = await asyncio.gather(*(
+            _gemini_generate_content(
+                [{"text": text}],
                 temperature=llm_temperature,
-                max_output_tokens=llm_max_tokens
+                max_output_tokens=llm_max_tokens,
+                system_instruction=prompt
             )
-            response_body["charges_analysis"] = {
-                "response": charges_response
+            for text, prompt in analysis_requests.values()
+        ))
+        for key, analysis_response in zip(analysis_requests, analysis_responses):
+            response_body[key] = {
+                "response": analysis_response
             }
 
-        return JSONResponse(response_body)
+        return ORJSONResponse(response_body)
 
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,28 @@
+"""
+Shared async HTTP client for outbound OCR / LLM API calls.
+"""
+
+from typing import Any, Dict, Optional
+
+import httpx
+import orjson
+
+# One pooled HTTP/2 client so Gemini and NVIDIA calls reuse connections
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=120,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
+
+
+async def post_json(url: str, payload: Any, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """POST a JSON body serialized with orjson (payloads carry multi-MB base64 images)"""
+    request_headers = {"Content-Type": "application/json"}
+    if headers:
+        request_headers.update(headers)
+    return await http_client.post(url, content=orjson.dumps(payload), headers=request_headers)
+
+
+async def close_http_client():
+    """Close pooled connections on shutdown"""
+    await http_client.aclose()
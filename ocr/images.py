@@ -0,0 +1,69 @@
+"""
+Image preprocessing shared by the OCR providers.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+import pybase64
+
+# OCR accuracy saturates well below phone-camera resolution
+DEFAULT_MAX_EDGE = 1600
+# Text-only OCR (Mistral) is fine at a smaller size. Capped by area, not long edge,
+# so tall app screenshots (1290x2796) keep a readable width
+OCR_MAX_PIXELS = 2_000_000
+JPEG_QUALITY = 85
+
+
+def downscale_image(
+    image_bytes: bytes,
+    mime_type: str,
+    max_edge: Optional[int] = DEFAULT_MAX_EDGE,
+    max_pixels: Optional[int] = None
+) -> Tuple[bytes, str]:
+    """
+    Shrink an uploaded image so its long edge is at most max_edge and its area at
+    most max_pixels (either limit may be None), and re-encode it as JPEG.
+
+    Inputs OpenCV cannot decode (PDF, GIF, ...) and images that are already
+    small enough are returned unchanged.
+    """
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return image_bytes, mime_type
+
+    h, w = image.shape[:2]
+    scale = 1.0
+    if max_edge is not None:
+        scale = min(scale, max_edge / max(h, w))
+    if max_pixels is not None:
+        scale = min(scale, math.sqrt(max_pixels / (h * w)))
+    if scale >= 1.0:
+        return image_bytes, mime_type
+
+    resized = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(".jpg", resized, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        return image_bytes, mime_type
+
+    return buffer.tobytes(), "image/jpeg"
+
+
+def encode_image_for_upload(
+    image_bytes: bytes,
+    mime_type: str,
+    max_edge: Optional[int] = DEFAULT_MAX_EDGE,
+    max_pixels: Optional[int] = None
+) -> Tuple[str, str]:
+    """
+    Downscale and base64-encode an image for an OCR / LLM request body.
+
+    CPU-bound on multi-MB uploads - call it through asyncio.to_thread.
+
+    Returns:
+        Tuple of (mime_type, base64_data)
+    """
+    image_bytes, mime_type = downscale_image(image_bytes, mime_type, max_edge, max_pixels)
+    return mime_type, pybase64.b64encode_as_string(image_bytes)
@@ -1,3 +1,6 @@
+# Bump whenever a prompt below changes so cached prefixes / responses are invalidated
+PROMPT_TEMPLATE_VERSION = "2"
+
 PROMPT_ITEMS = """
 You are an item-reconstruction engine for Instacart receipts.
 
@@ -106,35 +109,9 @@ FEE TAXABILITY RULES:
 - Other fees: taxable = false (unless explicitly taxed on receipt)
 """
 
-# Ontario HST Rules (13%)
-ONTARIO_HST_RULES = """
-ONTARIO HST RULES (for groceries/retail):
-
-ZERO-RATED (taxable = false):
-- Basic groceries: bread, milk, eggs, butter, cheese, yogurt, flour, rice, pasta, grains
-- Fresh fruits and vegetables (raw or minimally processed)
-- Fresh meat, fish, poultry (uncooked)
-- Baby food, formula
-- Coffee beans/grounds, tea (not prepared beverages)
-- Most packaged foods intended for home consumption
-
-TAXABLE (taxable = true):
-- Prepared foods: sandwiches, salads, hot meals, ready-to-eat items
-- Snacks: chips, candy, chocolate bars, cookies, pastries
-- Soft drinks, energy drinks, sweetened beverages
-- Alcohol (beer, wine, spirits)
-- Non-food items: cleaning supplies, toiletries, household items, electronics
-- Restaurant meals and catering
-- Bakery items sold individually (single muffin, donut, etc.)
-
-SPECIAL CASES:
-- If item is explicitly marked as "taxable" on receipt, classify as taxable
-- Instacart service fees, delivery fees, bag fees → usually taxable
-- When unsure, default to taxable = false for grocery items
-
 # ---------------- ABSOLUTE OVERRIDES ----------------
 # If these appear, the item is NOT food, regardless of food words.
-ALWAYS_TAXABLE = {
+ALWAYS_TAXABLE: frozenset[str] = frozenset({
     # Stationery / office
     "notebook", "pen", "pencil", "marker", "highlighter",
     "paper", "folder", "binder", "journal", "cahier",
@@ -147,17 +124,17 @@ ALWAYS_TAXABLE = {
     # Household / tools
     "cleaner", "detergent", "soap", "sponge", "brush",
     "battery", "electronics", "device", "charger",
-}
+})
 
 # ---------------- NON-FOOD OBJECT SIGNALS ----------------
 # These override food words like "oil", "vinegar", "salt"
-NON_FOOD_OBJECTS = {
+NON_FOOD_OBJECTS: frozenset[str] = frozenset({
     "dispenser", "container", "glass", "bottle", "jar",
     "tool", "kitchenware", "accessory", "holder"
-}
+})
 
 # ---------------- BASIC GROCERIES (NON-TAXABLE) ----------------
-NON_TAXABLE_KEYWORDS = {
+NON_TAXABLE_KEYWORDS: frozenset[str] = frozenset({
     # Dairy & eggs
     "milk", "cheese", "butter", "yogurt", "curd", "paneer",
     "egg", "eggs",
@@ -187,10 +164,10 @@ NON_TAXABLE_KEYWORDS = {
     # Cooking basics
     "oil", "olive", "canola", "sunflower",
     "salt", "sugar", "spice", "masala", "ginger", "garlic",
-}
+})
 
 # ---------------- TAXABLE CONSUMABLES ----------------
-TAXABLE_KEYWORDS = {
+TAXABLE_KEYWORDS: frozenset[str] = frozenset({
     # Snacks / processed food
     "chips", "crisps", "snack", "snacks",
     "chocolate", "candy", "cookie", "cookies",
@@ -208,5 +185,43 @@ TAXABLE_KEYWORDS = {
     # Alcohol / restricted
     "alcohol", "beer", "wine", "liquor",
     "cigarette", "tobacco", "vape",
-}
-"""
\ No newline at end of file
+})
+
+
+def _keywords(words: frozenset[str]) -> str:
+    return ", ".join(sorted(words))
+
+
+# Ontario HST Rules (13%) - keyword sets are interpolated in sorted order so the
+# prompt text stays byte-identical across runs
+ONTARIO_HST_RULES = f"""
+ONTARIO HST RULES (for groceries/retail):
+
+ZERO-RATED (taxable = false):
+- Basic groceries: bread, milk, eggs, butter, cheese, yogurt, flour, rice, pasta, grains
+- Fresh fruits and vegetables (raw or minimally processed)
+- Fresh meat, fish, poultry (uncooked)
+- Baby food, formula
+- Coffee beans/grounds, tea (not prepared beverages)
+- Most packaged foods intended for home consumption
+
+TAXABLE (taxable = true):
+- Prepared foods: sandwiches, salads, hot meals, ready-to-eat items
+- Snacks: chips, candy, chocolate bars, cookies, pastries
+- Soft drinks, energy drinks, sweetened beverages
+- Alcohol (beer, wine, spirits)
+- Non-food items: cleaning supplies, toiletries, household items, electronics
+- Restaurant meals and catering
+- Bakery items sold individually (single muffin, donut, etc.)
+
+SPECIAL CASES:
+- If item is explicitly marked as "taxable" on receipt, classify as taxable
+- Instacart service fees, delivery fees, bag fees → usually taxable
+- When unsure, default to taxable = false for grocery items
+
+KEYWORD HINTS:
+- Always taxable (not food, even next to food words): {_keywords(ALWAYS_TAXABLE)}
+- Non-food objects (override food words like oil, vinegar, salt): {_keywords(NON_FOOD_OBJECTS)}
+- Basic groceries (taxable = false): {_keywords(NON_TAXABLE_KEYWORDS)}
+- Taxable consumables (taxable = true): {_keywords(TAXABLE_KEYWORDS)}
+"""
@@ -2,14 +2,27 @@ from http.client import HTTPException
 import os
 from typing import List
 
-import requests
 from fastapi import HTTPException
 from typing import List, Optional
 
+import orjson
+from dotenv import load_dotenv
 
-def call_nvidia_llama_vision(
+from ocr.http_client import post_json
+from ocr.instructions import PROMPT_TEMPLATE_VERSION
+from ocr.llm_cache import llm_cache, make_cache_key
+
+# Read once at import, which can happen before main.py loads .env
+load_dotenv()
+
+NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
+LLAMA_MODEL = "meta/llama-3.2-90b-vision-instruct"
+
+
+async def call_nvidia_llama_vision(
     image_files_base64: Optional[List[tuple[str, str]]] = None,
-    prompt: str = ""
+    prompt: str = "",
+    system_prompt: Optional[str] = None
 ) -> str:
     """
     Call NVIDIA Llama 3.2 90B Vision Instruct model with base64-encoded images.
@@ -18,17 +31,23 @@ def call_nvidia_llama_vision(
         image_files_base64: Optional list of tuples (mime_type, base64_data)
                            e.g., [("image/png", "iVBORw0KG..."), ("image/jpeg", "...")]
         prompt: Text prompt to send along with images
+        system_prompt: Optional constant instructions sent as a leading system
+                       message so the endpoint can reuse the cached prefix
     
     Returns:
         Model response text
     """
-    api_key = os.getenv("NVIDIA_API_KEY")
-    if not api_key:
+    if not NVIDIA_API_KEY:
         raise HTTPException(
             status_code=500,
             detail="NVIDIA_API_KEY not configured."
         )
 
+    cache_key = make_cache_key(LLAMA_MODEL, PROMPT_TEMPLATE_VERSION, image_files_base64, system_prompt, prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     invoke_url = "https://integrate.api.nvidia.com/v1/chat/completions"
     
     # Build content array with text + images
@@ -43,18 +62,18 @@ def call_nvidia_llama_vision(
             })
     
     headers = {
-        "Authorization": f"Bearer {api_key}",
+        "Authorization": f"Bearer {NVIDIA_API_KEY}",
         "Content-Type": "application/json",
     }
     
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": content})
+
     payload = {
-        "model": "meta/llama-3.2-90b-vision-instruct",
-        "messages": [
-            {
-                "role": "user",
-                "content": content
-            }
-        ],
+        "model": LLAMA_MODEL,
+        "messages": messages,
         "max_tokens": 4096,
         "temperature": 1.0,
         "top_p": 1.0,
@@ -63,7 +82,7 @@ def call_nvidia_llama_vision(
     }
 
     try:
-        resp = requests.post(invoke_url, headers=headers, json=payload, timeout=120)
+        resp = await post_json(invoke_url, payload, headers=headers)
         
         # Log response for debugging
         if resp.status_code != 200:
@@ -75,7 +94,7 @@ def call_nvidia_llama_vision(
             )
         
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         choices = data.get("choices", [])
         if not choices:
             raise ValueError("No choices returned from Llama API")
@@ -83,6 +102,7 @@ def call_nvidia_llama_vision(
         content = message.get("content")
         if not content:
             raise ValueError("Empty content from Llama API")
+        llm_cache.set(cache_key, content)
         return content
     except HTTPException:
         raise
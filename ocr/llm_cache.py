@@ -0,0 +1,55 @@
+"""
+In-process exact-match cache for LLM / OCR API responses.
+"""
+
+import hashlib
+import threading
+from typing import Any, Optional
+
+import orjson
+from cachetools import TTLCache
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash the full request inputs (model, params, prompt, images) into a stable key"""
+    encoded = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    """Short digest of raw upload bytes (images are too large to put in a key directly)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """TTL-bounded response cache with hit/miss counters"""
+
+    def __init__(self, name: str, maxsize: int = 4096, ttl: int = 86400, log_every: int = 100):
+        self.name = name
+        self.log_every = log_every
+        self.hits = 0
+        self.misses = 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            lookups = self.hits + self.misses
+
+        if lookups % self.log_every == 0:
+            print(f"cache_stats {self.name}: hits={self.hits} misses={self.misses} "
+                  f"hit_rate={self.hits / lookups:.1%} size={len(self._cache)}")
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+
+llm_cache = ResponseCache("llm")
+ocr_cache = ResponseCache("ocr", maxsize=1000)
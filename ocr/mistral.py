@@ -1,5 +1,6 @@
-import base64
 import os
+
+import pybase64
 from mistralai import Mistral, JSONSchema, ResponseFormat
 
 api_key = os.environ["MISTRAL_API_KEY"]
@@ -8,7 +9,7 @@ client = Mistral(api_key=api_key)
 
 def encode_file(file_path):
     with open(file_path, "rb") as pdf_file:
-        return base64.b64encode(pdf_file.read()).decode('utf-8')
+        return pybase64.b64encode_as_string(pdf_file.read())
 
 file_path = "path/to/2a.jpeg"
 base64_file = encode_file(file_path)
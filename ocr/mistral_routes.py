@@ -2,14 +2,19 @@
 FastAPI routes for Mistral OCR processing.
 """
 
-import base64
-import json
+import asyncio
 import os
+import re
 from typing import Dict, List, Optional
+
+import orjson
 from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from mistralai import Mistral, JSONSchema, ResponseFormat
 
+from ocr.images import OCR_MAX_PIXELS, encode_image_for_upload
+from ocr.llm_cache import content_hash, make_cache_key, ocr_cache
+
 router = APIRouter(prefix="/mistral-ocr", tags=["mistral-ocr"])
 
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
@@ -17,6 +22,13 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 if not MISTRAL_API_KEY:
     print("WARNING: MISTRAL_API_KEY environment variable not set - Mistral OCR will not work")
 
+# One client (and connection pool) for the whole process
+_mistral_client = Mistral(api_key=MISTRAL_API_KEY) if MISTRAL_API_KEY else None
+
+# Cap concurrent Mistral calls per process to stay under the API rate limit
+MISTRAL_MAX_CONCURRENCY = int(os.getenv("MISTRAL_MAX_CONCURRENCY", "5"))
+_mistral_semaphore = asyncio.Semaphore(MISTRAL_MAX_CONCURRENCY)
+
 
 def _build_ocr_schema():
     """Build the JSON schema for Mistral OCR response."""
@@ -117,6 +129,30 @@ def _build_ocr_schema():
     )
 
 
+# Static per process - built once instead of on every OCR call
+_OCR_SCHEMA = _build_ocr_schema()
+_ANNOTATION_FORMAT = ResponseFormat(type="json_schema", json_schema=_OCR_SCHEMA)
+
+_OCR_PROMPT = (
+    "Ignore the item images. "
+    "Don't worry about the per qty/weight prices. The final price of the item(first line, immediate right side of the item name) is enough.  \n\n"
+    "RULES:\n"
+    "- You MUST NOT invent numeric values.\n"
+    "- You MUST NOT calculate totals or prices.\n"
+    "- If a numeric value is not clearly present, set it to null.\n\n"
+    "PATTERNS:\n"
+    "- Quantity: \"N ct\", \"Nct\", \"X kg\", \"X lb\"\n"
+    "- Price: \"$X each\", price near item name\n"
+    "- Ignore UI noise like \"|\", stray numbers, icons\n"
+    "- Discounted Items have strikethrough characters, ignore them\n"
+    "- Some items have long item names wrapping to next lines, make sure you capture that correctly.\n"
+    "- For Replacement section - ignore the field \"Replacement for \", it's not useful"
+)
+
+# Extracted items are objects inside an array; without one the annotation is empty / just the schema
+_ITEM_ARRAY_RE = re.compile(r'\[\s*\{')
+
+
 async def process_image_with_mistral(image_data: bytes, mime_type: str = "image/jpeg") -> tuple[Dict, Dict]:
     """
     Process a single image with Mistral OCR.
@@ -130,6 +166,7 @@ async def process_image_with_mistral(image_data: bytes, mime_type: str = "image/
         - status: 'success', 'failed', 'empty_response', 'timeout', 'parse_error'
         - message: Human readable status message
         - error: Error details if any
+        - cache: 'HIT' or 'MISS' for successful extractions
     """
     if not MISTRAL_API_KEY:
         return (
@@ -137,36 +174,28 @@ async def process_image_with_mistral(image_data: bytes, mime_type: str = "image/
             {"status": "failed", "message": "MISTRAL_API_KEY not configured", "error": "No API key"}
         )
     
+    # Re-uploads / duplicate scans of the same image skip the API entirely
+    cache_key = make_cache_key("mistral-ocr-latest", _OCR_PROMPT, content_hash(image_data))
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        result, status = cached
+        return result, {**status, "cache": "HIT"}
+
     try:
-        client = Mistral(api_key=MISTRAL_API_KEY)
-        base64_image = base64.b64encode(image_data).decode('utf-8')
+        # Downscale + encode off the event loop; passes PDFs/GIFs through untouched
+        mime_type, base64_image = await asyncio.to_thread(
+            encode_image_for_upload, image_data, mime_type, max_edge=None, max_pixels=OCR_MAX_PIXELS
+        )
         
-        ocr_response = client.ocr.process(
+        ocr_response = await _mistral_client.ocr.process_async(
             document={
                 "type": "image_url",
                 "image_url": f"data:{mime_type};base64,{base64_image}"
             },
             model="mistral-ocr-latest",
             include_image_base64=False,
-            document_annotation_format=ResponseFormat(
-                type="json_schema",
-                json_schema=_build_ocr_schema(),
-            ),
-            document_annotation_prompt=(
-                "Ignore the item images. "
-                "Don't worry about the per qty/weight prices. The final price of the item(first line, immediate right side of the item name) is enough.  \n\n"
-                "RULES:\n"
-                "- You MUST NOT invent numeric values.\n"
-                "- You MUST NOT calculate totals or prices.\n"
-                "- If a numeric value is not clearly present, set it to null.\n\n"
-                "PATTERNS:\n"
-                "- Quantity: \"N ct\", \"Nct\", \"X kg\", \"X lb\"\n"
-                "- Price: \"$X each\", price near item name\n"
-                "- Ignore UI noise like \"|\", stray numbers, icons\n"
-                "- Discounted Items have strikethrough characters, ignore them\n"
-                "- Some items have long item names wrapping to next lines, make sure you capture that correctly.\n"
-                "- For Replacement section - ignore the field \"Replacement for \", it's not useful"
-            )
+            document_annotation_format=_ANNOTATION_FORMAT,
+            document_annotation_prompt=_OCR_PROMPT
         )
         
         # Validate response has required attribute
@@ -188,10 +217,17 @@ async def process_image_with_mistral(image_data: bytes, mime_type: str = "image/
                 {"status": "empty_response", "message": "document_annotation is empty", "error": "Empty content"}
             )
         
+        # Skip the full parse when there is no array of item objects at all
+        if not _ITEM_ARRAY_RE.search(ocr_response.document_annotation):
+            return (
+                {"replacements": [], "found": [], "refunded": []},
+                {"status": "empty_response", "message": "Schema returned but no items extracted", "error": "Mistral found no items"}
+            )
+        
         # Parse JSON
         try:
-            parsed_data = json.loads(ocr_response.document_annotation)
-        except json.JSONDecodeError as e:
+            parsed_data = orjson.loads(ocr_response.document_annotation)
+        except orjson.JSONDecodeError as e:
             return (
                 {"replacements": [], "found": [], "refunded": []},
                 {"status": "parse_error", "message": f"Failed to parse JSON: {str(e)}", "error": str(e)}
@@ -210,7 +246,9 @@ async def process_image_with_mistral(image_data: bytes, mime_type: str = "image/
                 'refunded': parsed_data.get('refunded', [])
             }
             items_count = len(result['replacements']) + len(result['found']) + len(result['refunded'])
-            return (result, {"status": "success", "message": f"Extracted {items_count} items", "items_found": items_count})
+            status = {"status": "success", "message": f"Extracted {items_count} items", "items_found": items_count}
+            ocr_cache.set(cache_key, (result, status))
+            return (result, {**status, "cache": "MISS"})
         else:
             # This is just the schema, no actual data extracted
             return (
@@ -230,6 +268,28 @@ async def process_image_with_mistral(image_data: bytes, mime_type: str = "image/
         )
 
 
+async def _process_image_with_limit(image_data: bytes, mime_type: str) -> tuple[Dict, Dict]:
+    async with _mistral_semaphore:
+        return await process_image_with_mistral(image_data, mime_type)
+
+
+async def _process_upload_with_mistral(
+    image: UploadFile,
+    in_flight: Dict[str, asyncio.Task]
+) -> tuple[Dict, Dict]:
+    image_data = await image.read()
+    # Release the spooled temp file now rather than at the end of the whole request
+    await image.close()
+
+    # Duplicate uploads in the same request share one OCR call
+    digest = content_hash(image_data)
+    if digest not in in_flight:
+        in_flight[digest] = asyncio.create_task(
+            _process_image_with_limit(image_data, image.content_type or "image/jpeg")
+        )
+    return await in_flight[digest]
+
+
 @router.post("/extract-items")
 async def extract_items_mistral(
     images: List[UploadFile] = File(..., description="One or more receipt images to process")
@@ -272,13 +332,19 @@ async def extract_items_mistral(
         all_refunded = []
         processing_status = []
         
-        # Process each image
-        for idx, image in enumerate(images):
-            image_data = await image.read()
-            mime_type = image.content_type or "image/jpeg"
-            
-            # Process image and get both data and status
-            response_data, status = await process_image_with_mistral(image_data, mime_type)
+        # Process all images concurrently (bounded by the semaphore); gather keeps input order
+        in_flight: Dict[str, asyncio.Task] = {}
+        results = await asyncio.gather(
+            *(_process_upload_with_mistral(image, in_flight) for image in images),
+            return_exceptions=True
+        )
+        
+        for idx, (image, result) in enumerate(zip(images, results)):
+            if isinstance(result, Exception):
+                response_data = {"replacements": [], "found": [], "refunded": []}
+                status = {"status": "failed", "message": f"Mistral OCR processing failed: {str(result)}", "error": str(result)}
+            else:
+                response_data, status = result
             
             # Record status for this image
             status_entry = {
@@ -296,19 +362,19 @@ async def extract_items_mistral(
             if response_data.get("refunded"):
                 all_refunded.extend(response_data["refunded"])
         
-        # Combine all items with category labels
-        all_items = []
-        for item in all_replacements:
-            all_items.append({**item, "category": "replacement"})
-        for item in all_found:
-            all_items.append({**item, "category": "found"})
-        for item in all_refunded:
-            all_items.append({**item, "category": "refunded"})
+        # Combine all items with category labels. Copies, not in-place labels: the item
+        # dicts are shared with ocr_cache and between duplicate uploads, and the
+        # per-category arrays must keep their original shape
+        all_items = (
+            [{**item, "category": "replacement"} for item in all_replacements]
+            + [{**item, "category": "found"} for item in all_found]
+            + [{**item, "category": "refunded"} for item in all_refunded]
+        )
         
         # Determine overall success (at least one successful extraction)
         has_success = any(s.get("status") == "success" for s in processing_status)
         
-        return JSONResponse({
+        return ORJSONResponse({
             "success": has_success,
             "items": all_items,
             "replacements": all_replacements,
@@ -317,7 +383,7 @@ async def extract_items_mistral(
             "total_images_processed": len(images),
             "item_count": len(all_items),
             "processing_status": processing_status
-        })
+        }, headers={"X-Cache": "HIT" if all(s.get("cache") == "HIT" for s in processing_status) else "MISS"})
     
     except HTTPException:
         raise
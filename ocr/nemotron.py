@@ -1,4 +1,21 @@
-def call_nvidia_nemotron_vision(
+import os
+from typing import List
+
+import orjson
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from ocr.http_client import post_json
+from ocr.llm_cache import llm_cache, make_cache_key
+
+# Read once at import, which can happen before main.py loads .env
+load_dotenv()
+
+NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
+NEMOTRON_MODEL = "nvidia/nemotron-nano-12b-v2-vl"
+
+
+async def call_nvidia_nemotron_vision(
     image_files_base64: List[tuple[str, str]],
     prompt: str
 ) -> str:
@@ -13,13 +30,17 @@ def call_nvidia_nemotron_vision(
     Returns:
         Model response text
     """
-    api_key = os.getenv("NVIDIA_API_KEY")
-    if not api_key:
+    if not NVIDIA_API_KEY:
         raise HTTPException(
             status_code=500,
             detail="NVIDIA_API_KEY not configured."
         )
 
+    cache_key = make_cache_key(NEMOTRON_MODEL, image_files_base64, prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     invoke_url = "https://integrate.api.nvidia.com/v1/chat/completions"
 
     # Build content array with text + images
@@ -33,12 +54,12 @@ def call_nvidia_nemotron_vision(
         })
     
     headers = {
-        "Authorization": f"Bearer {api_key}",
+        "Authorization": f"Bearer {NVIDIA_API_KEY}",
         "Content-Type": "application/json",
     }
     
     payload = {
-        "model": "nvidia/nemotron-nano-12b-v2-vl",
+        "model": NEMOTRON_MODEL,
         "messages": [
             {
                 "role": "system",
@@ -57,9 +78,9 @@ def call_nvidia_nemotron_vision(
     }
 
     try:
-        resp = requests.post(invoke_url, headers=headers, json=payload, timeout=120)
+        resp = await post_json(invoke_url, payload, headers=headers)
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         choices = data.get("choices", [])
         if not choices:
             raise ValueError("No choices returned from Nemotron API")
@@ -67,6 +88,7 @@ def call_nvidia_nemotron_vision(
         content = message.get("content")
         if not content:
             raise ValueError("Empty content from Nemotron API")
+        llm_cache.set(cache_key, content)
         return content
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Nemotron API error: {str(e)}")
@@ -1,14 +1,31 @@
+import asyncio
+import os
+import re
 from http.client import HTTPException
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from fastapi.responses import JSONResponse
-import requests
+from fastapi.responses import ORJSONResponse
+import httpx
+import numpy as np
+import orjson
+
+from ocr.http_client import http_client, post_json
+from ocr.instructions import ONTARIO_HST_RULES, PROMPT_TEMPLATE_VERSION
+from ocr.llm_cache import llm_cache, make_cache_key
+from ocr.taxability import classify_item_simple_rules, match_simple_rules
+
+NVIDIA_OCR_MAX_CONCURRENCY = int(os.getenv("NVIDIA_OCR_MAX_CONCURRENCY", "5"))
+_nvidia_ocr_semaphore = asyncio.Semaphore(NVIDIA_OCR_MAX_CONCURRENCY)
+
+_JSON_ARRAY_RE = re.compile(r'\[(.*?)\]', re.DOTALL)
 
 
 def classify_items_batch(line_items: List[Dict], use_llm: str = "mistral") -> List[Dict]:
     """
     Classify all line items in a batch using LLM.
     
+    Items matched by a keyword rule are decided locally; only the rest are sent to the LLM.
+    
     Args:
         line_items: List of line item dicts with 'name_raw' field
         use_llm: Which LLM to use (default: "mistral")
@@ -19,8 +36,20 @@ def classify_items_batch(line_items: List[Dict], use_llm: str = "mistral") -> Li
     if not line_items:
         return line_items
     
+    # Items a keyword rule already decides never go to the LLM
+    unresolved = []
+    for item in line_items:
+        taxable = match_simple_rules(item.get('name_raw', item.get('name', '')))
+        if taxable is None:
+            unresolved.append(item)
+        else:
+            item['taxable'] = taxable
+
+    if not unresolved:
+        return line_items
+    
     # Batch classify using LLM for efficiency
-    items_text = "\n".join([f"- {item.get('name_raw', item.get('name', 'unknown'))}" for item in line_items])
+    items_text = "\n".join([f"- {item.get('name_raw', item.get('name', 'unknown'))}" for item in unresolved])
     
     prompt = f"""
 {ONTARIO_HST_RULES}
@@ -36,32 +65,32 @@ Return ONLY a JSON array with true/false values in the same order:
 No explanation, just the JSON array.
 """
     
-    response_text = ""
+    # Same item list + model + rules version -> reuse the earlier LLM answer
+    cache_key = make_cache_key("taxability", use_llm, PROMPT_TEMPLATE_VERSION, items_text)
+    response_text = llm_cache.get(cache_key) or ""
     
     try:
-        # Route to appropriate LLM
-        if use_llm == "llama":
-            response_text = call_llama_for_taxability(prompt)
-        elif use_llm == "nemotron":
-            response_text = call_nemotron_for_taxability(prompt)
-        # elif use_llm == "mistral":
-        #     response_text = call_mistral_for_taxability(prompt)
-        # elif use_llm == "gemma":
-        #     response_text = call_gemma_for_taxability(prompt)
-        # else:
-        #     response_text = call_gemini_for_taxability(prompt)
-        
-        # Parse response
-        import json
-        import re
+        if not response_text:
+            # Route to appropriate LLM
+            if use_llm == "llama":
+                response_text = call_llama_for_taxability(prompt)
+            elif use_llm == "nemotron":
+                response_text = call_nemotron_for_taxability(prompt)
+            # elif use_llm == "mistral":
+            #     response_text = call_mistral_for_taxability(prompt)
+            # elif use_llm == "gemma":
+            #     response_text = call_gemma_for_taxability(prompt)
+            # else:
+            #     response_text = call_gemini_for_taxability(prompt)
         
         # Extract JSON array from response
-        match = re.search(r'\[(.*?)\]', response_text, re.DOTALL)
+        match = _JSON_ARRAY_RE.search(response_text)
         if match:
-            results = json.loads(match.group(0))
+            results = orjson.loads(match.group(0))
+            llm_cache.set(cache_key, response_text)
             
             # Add taxable field to each item
-            for i, item in enumerate(line_items):
+            for i, item in enumerate(unresolved):
                 if i < len(results):
                     taxable_str = str(results[i]).lower()
                     item['taxable'] = taxable_str == 'true'
@@ -70,61 +99,17 @@ No explanation, just the JSON array.
         else:
             # Fallback: classify individually
             print("⚠️ Batch classification failed, using fallback")
-            for item in line_items:
+            for item in unresolved:
                 item['taxable'] = classify_item_simple_rules(item.get('name_raw', item.get('name', '')))
                 
     except Exception as e:
         print(f"❌ LLM classification failed: {e}, using simple rules")
-        for item in line_items:
+        for item in unresolved:
             item['taxable'] = classify_item_simple_rules(item.get('name_raw', item.get('name', '')))
     
     return line_items
 
-def classify_item_simple_rules(item_name: str) -> bool:
-    """
-    Simple rule-based classification without LLM.
-    
-    Returns:
-        True if taxable, False if non-taxable
-    """
-    item_lower = item_name.lower()
-    
-    # Non-taxable keywords (basic groceries)
-    non_taxable_keywords = [
-        'banana', 'apple', 'orange', 'grape', 'berry', 'fruit',
-        'milk', 'egg', 'butter', 'cheese', 'yogurt', 'cream',
-        'bread', 'bun', 'bagel', 'pita',
-        'rice', 'flour', 'pasta', 'grain', 'oat', 'cereal',
-        'chicken', 'beef', 'pork', 'fish', 'meat', 'turkey',
-        'carrot', 'lettuce', 'tomato', 'potato', 'onion', 'vegetable',
-        'coffee', 'tea',
-        'organic', 'fresh', 'selection'  # Store brand indicators
-    ]
-    
-    # Taxable keywords
-    taxable_keywords = [
-        'chip', 'candy', 'chocolate', 'cookie', 'pastry', 'cake',
-        'soda', 'pop', 'juice drink', 'energy drink',
-        'alcohol', 'beer', 'wine', 'spirit',
-        'prepared', 'ready to eat', 'sandwich', 'salad',
-        'cleaning', 'soap', 'detergent', 'shampoo',
-        'paper towel', 'tissue', 'toilet paper'
-    ]
-    
-    # Check taxable first (more specific)
-    for keyword in taxable_keywords:
-        if keyword in item_lower:
-            return True
-    
-    # Check non-taxable
-    for keyword in non_taxable_keywords:
-        if keyword in item_lower:
-            return False
-    
-    # Default to non-taxable for grocery items (Ontario default)
-    return False
-
-def _upload_asset(input_data: bytes, description: str) -> uuid.UUID:
+async def _upload_asset(input_data: bytes, description: str) -> uuid.UUID:
     """
     Uploads an asset to the NVCF API.
 
@@ -147,15 +132,16 @@ def _upload_asset(input_data: bytes, description: str) -> uuid.UUID:
 
     payload = {"contentType": "image/jpeg", "description": description}
 
-    response = requests.post(assets_url, headers=headers, json=payload, timeout=30)
+    response = await post_json(assets_url, payload, headers=headers)
     response.raise_for_status()
 
-    asset_url = response.json()["uploadUrl"]
-    asset_id = response.json()["assetId"]
+    asset = orjson.loads(response.content)
+    asset_url = asset["uploadUrl"]
+    asset_id = asset["assetId"]
 
-    response = requests.put(
+    response = await http_client.put(
         asset_url,
-        data=input_data,
+        content=input_data,
         headers=s3_headers,
         timeout=300,
     )
@@ -164,25 +150,127 @@ def _upload_asset(input_data: bytes, description: str) -> uuid.UUID:
     return uuid.UUID(asset_id)
 
 
-def box_stats(polygon: Dict) -> Dict:
-    """Calculate bounding box statistics from polygon coordinates."""
-    xs = [polygon["x1"], polygon["x2"], polygon["x3"], polygon["x4"]]
-    ys = [polygon["y1"], polygon["y2"], polygon["y3"], polygon["y4"]]
+_POLYGON_XS = ("x1", "x2", "x3", "x4")
+_POLYGON_YS = ("y1", "y2", "y3", "y4")
+
+
+def box_stats(polygons: List[Dict]) -> Dict[str, np.ndarray]:
+    """Calculate bounding box statistics for all polygons at once, one array entry per polygon."""
+    xs = np.fromiter((p[k] for p in polygons for k in _POLYGON_XS), dtype=np.float64, count=len(polygons) * 4).reshape(-1, 4)
+    ys = np.fromiter((p[k] for p in polygons for k in _POLYGON_YS), dtype=np.float64, count=len(polygons) * 4).reshape(-1, 4)
+    ymin = ys.min(axis=1)
+    ymax = ys.max(axis=1)
     return {
-        "xmin": min(xs),
-        "xmax": max(xs),
-        "ymin": min(ys),
-        "ymax": max(ys),
-        "xc": sum(xs) / 4.0,
-        "yc": sum(ys) / 4.0,
-        "h": max(ys) - min(ys),
+        "xmin": xs.min(axis=1),
+        "xmax": xs.max(axis=1),
+        "ymin": ymin,
+        "ymax": ymax,
+        "xc": xs.mean(axis=1),
+        "yc": ys.mean(axis=1),
+        "h": ymax - ymin,
     }
 
 
+def _assign_lines_sweep(
+    b: Dict[str, np.ndarray],
+    y_overlap_ratio: float,
+    max_y_gap_factor: float
+) -> List[List[int]]:
+    """Place each word (top-to-bottom) on the first existing line it fits, growing that line's envelope."""
+    # Sort top-to-bottom
+    order = np.argsort(b["yc"], kind="stable")
+    w_ymin, w_ymax, w_yc, w_h = (b[k][order] for k in ("ymin", "ymax", "yc", "h"))
+
+    # Line envelopes; only the first n_lines entries are live
+    line_ymin = np.empty(len(order))
+    line_ymax = np.empty(len(order))
+    line_yc = np.empty(len(order))
+    line_h = np.empty(len(order))
+    line_words: List[List[int]] = []
+
+    for i, word in enumerate(order):
+        n_lines = len(line_words)
+        if n_lines:
+            ymin, ymax = line_ymin[:n_lines], line_ymax[:n_lines]
+            ref_h = line_h[:n_lines]
+
+            y_dist = np.abs(w_yc[i] - line_yc[:n_lines])
+            allowed = np.maximum(w_h[i], ref_h) * max_y_gap_factor
+
+            # vertical overlap test
+            overlap = np.minimum(w_ymax[i], ymax) - np.maximum(w_ymin[i], ymin)
+
+            matches = np.flatnonzero((overlap > np.minimum(w_h[i], ref_h) * y_overlap_ratio) | (y_dist <= allowed))
+            if matches.size:
+                j = matches[0]
+                line_words[j].append(word)
+                # update line envelope
+                line_ymin[j] = min(line_ymin[j], w_ymin[i])
+                line_ymax[j] = max(line_ymax[j], w_ymax[i])
+                line_yc[j] = (line_ymin[j] + line_ymax[j]) / 2
+                line_h[j] = line_ymax[j] - line_ymin[j]
+                continue
+
+        line_ymin[n_lines] = w_ymin[i]
+        line_ymax[n_lines] = w_ymax[i]
+        line_yc[n_lines] = w_yc[i]
+        line_h[n_lines] = w_h[i]
+        line_words.append([word])
+
+    return line_words
+
+
+def _assign_lines_bucketed(
+    b: Dict[str, np.ndarray],
+    y_overlap_ratio: float,
+    max_y_gap_factor: float
+) -> List[np.ndarray]:
+    """
+    Group words into horizontal bands of ~0.8 median word height, then merge
+    neighbouring bands that pass the same overlap / gap test as the sweep.
+
+    O(N) assignment plus a sort over the occupied bands.
+    """
+    bucket_h = max(float(np.median(b["h"])) * 0.8, 1.0)
+
+    # Sorted by yc, band keys are non-decreasing, so every band is a contiguous run of `order`
+    order = np.argsort(b["yc"], kind="stable")
+    keys = np.rint(b["yc"][order] / bucket_h).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    band_keys = keys[starts]
+    band_ymin = np.minimum.reduceat(b["ymin"][order], starts)
+    band_ymax = np.maximum.reduceat(b["ymax"][order], starts)
+
+    line_bands: List[List[int]] = []
+    for band in range(len(starts)):
+        ymin, ymax = float(band_ymin[band]), float(band_ymax[band])
+        yc = (ymin + ymax) / 2
+        h = ymax - ymin
+
+        if band and band_keys[band] == band_keys[band - 1] + 1:
+            overlap = min(ymax, line_ymax) - max(ymin, line_ymin)
+            allowed = max(h, line_h) * max_y_gap_factor
+            if overlap > min(h, line_h) * y_overlap_ratio or abs(yc - line_yc) <= allowed:
+                line_bands[-1].append(band)
+                line_ymin = min(line_ymin, ymin)
+                line_ymax = max(line_ymax, ymax)
+                line_yc = (line_ymin + line_ymax) / 2
+                line_h = line_ymax - line_ymin
+                continue
+
+        line_bands.append([band])
+        line_ymin, line_ymax, line_yc, line_h = ymin, ymax, yc, h
+
+    # Merged bands are adjacent, so each line is one slice of `order`
+    return [order[starts[bands[0]]:ends[bands[-1]]] for bands in line_bands]
+
+
 def stitch_lines(
     metadata: List[Dict],
     y_overlap_ratio: float = 0.6,
-    max_y_gap_factor: float = 0.9
+    max_y_gap_factor: float = 0.9,
+    strict: bool = False
 ) -> List[str]:
     """
     Stitches detected text boxes into logical lines.
@@ -190,65 +278,55 @@ def stitch_lines(
     :param metadata: List of detected text boxes with labels and polygons
     :param y_overlap_ratio: Minimum vertical overlap ratio to consider same line
     :param max_y_gap_factor: Maximum vertical gap factor relative to box height
+    :param strict: Use the original word-by-word line sweep instead of y-center buckets
     :return: List of stitched text lines
     """
-    words = []
-    for item in metadata:
-        polygon = item["polygon"]
-        # Skip items where x1 or x4 is below 185 (likely UI elements on the left)
-        if polygon.get("x1", float('inf')) < 180 or polygon.get("x4", float('inf')) < 180:
-            continue
-        
-        b = box_stats(polygon)
-        words.append({
-            "text": item["label"],
-            **b
-        })
+    # Skip items where x1 or x4 is below 180 (likely UI elements on the left)
+    kept = [
+        item for item in metadata
+        if item["polygon"].get("x1", float('inf')) >= 180 and item["polygon"].get("x4", float('inf')) >= 180
+    ]
+    if not kept:
+        return []
 
-    # Sort top-to-bottom
-    words.sort(key=lambda w: w["yc"])
+    texts = [item["label"] for item in kept]
+    b = box_stats([item["polygon"] for item in kept])
 
-    lines = []
+    assign_lines = _assign_lines_sweep if strict else _assign_lines_bucketed
+    line_words = assign_lines(b, y_overlap_ratio, max_y_gap_factor)
 
-    for w in words:
-        placed = False
-        for line in lines:
-            # reference line vertical center and height
-            ref_y = line["yc"]
-            ref_h = line["h"]
+    # Sort words left-to-right inside each line
+    xmin = b["xmin"]
+    stitched = []
+    for words in line_words:
+        words = np.asarray(words)
+        stitched.append(" ".join(texts[k] for k in words[np.argsort(xmin[words], kind="stable")]))
 
-            y_dist = abs(w["yc"] - ref_y)
-            allowed = max(w["h"], ref_h) * max_y_gap_factor
+    return stitched
 
-            # vertical overlap test
-            overlap = min(w["ymax"], line["ymax"]) - max(w["ymin"], line["ymin"])
+async def _process_nvidia_image(image: UploadFile, description: str) -> str:
+    """Upload one image, run OCDRNet on it and return the stitched text"""
+    async with _nvidia_ocr_semaphore:
+        image_data = await image.read()
+        asset_id = await _upload_asset(image_data, description)
 
-            if overlap > min(w["h"], ref_h) * y_overlap_ratio or y_dist <= allowed:
-                line["words"].append(w)
-                # update line envelope
-                line["ymin"] = min(line["ymin"], w["ymin"])
-                line["ymax"] = max(line["ymax"], w["ymax"])
-                line["yc"] = (line["ymin"] + line["ymax"]) / 2
-                line["h"] = line["ymax"] - line["ymin"]
-                placed = True
-                break
-
-        if not placed:
-            lines.append({
-                "words": [w],
-                "ymin": w["ymin"],
-                "ymax": w["ymax"],
-                "yc": w["yc"],
-                "h": w["h"],
-            })
+        inputs = {"image": f"{asset_id}", "render_label": False}
+        asset_list = f"{asset_id}"
 
-    # Sort words left-to-right inside each line
-    stitched = []
-    for line in lines:
-        line["words"].sort(key=lambda w: w["xmin"])
-        stitched.append(" ".join(w["text"] for w in line["words"]))
+        headers = {
+            "Content-Type": "application/json",
+            "NVCF-INPUT-ASSET-REFERENCES": asset_list,
+            "NVCF-FUNCTION-ASSET-IDS": asset_list,
+            "Authorization": HEADER_AUTH,
+        }
 
-    return stitched
+        response = await post_json(NVAI_URL, inputs, headers=headers)
+        response.raise_for_status()
+
+        metadata = await _process_ocr_response(response)
+
+    detections = metadata.get("metadata", metadata.get("detections", metadata.get("data", []))) if isinstance(metadata, dict) else metadata
+    return "\n".join(stitch_lines(detections))
 
 @app.post("/nvidia-ocr/extract-text")
 async def extract_text_nvidia(
@@ -296,51 +374,11 @@ async def extract_text_nvidia(
                 detail="PDF processing not yet implemented. Use image mode for now."
             )
 
-        # images mode
-        items_texts = []
-        for item_image in items_images:
-            image_data = await item_image.read()
-
-            asset_id = _upload_asset(image_data, "Items Image")
-
-            inputs = {"image": f"{asset_id}", "render_label": False}
-            asset_list = f"{asset_id}"
-
-            headers = {
-                "Content-Type": "application/json",
-                "NVCF-INPUT-ASSET-REFERENCES": asset_list,
-                "NVCF-FUNCTION-ASSET-IDS": asset_list,
-                "Authorization": HEADER_AUTH,
-            }
-
-            response = requests.post(NVAI_URL, headers=headers, json=inputs, timeout=60)
-            response.raise_for_status()
-
-            metadata = await _process_ocr_response(response)
-            detections = metadata.get("metadata", metadata.get("detections", metadata.get("data", []))) if isinstance(metadata, dict) else metadata
-            stitched_lines = stitch_lines(detections)
-            items_texts.append("\n".join(stitched_lines))
-
-        charges_data = await charges_image.read()
-        asset_id = _upload_asset(charges_data, "Charges Image")
-
-        inputs = {"image": f"{asset_id}", "render_label": False}
-        asset_list = f"{asset_id}"
-
-        headers = {
-            "Content-Type": "application/json",
-            "NVCF-INPUT-ASSET-REFERENCES": asset_list,
-            "NVCF-FUNCTION-ASSET-IDS": asset_list,
-            "Authorization": HEADER_AUTH,
-        }
-
-        response = requests.post(NVAI_URL, headers=headers, json=inputs, timeout=60)
-        response.raise_for_status()
-
-        metadata = await _process_ocr_response(response)
-        detections = metadata.get("metadata", metadata.get("detections", metadata.get("data", []))) if isinstance(metadata, dict) else metadata
-        stitched_lines = stitch_lines(detections)
-        charges_text = "\n".join(stitched_lines)
+        # images mode: every image is an independent upload -> OCR -> stitch pipeline
+        *items_texts, charges_text = await asyncio.gather(
+            *(_process_nvidia_image(item_image, "Items Image") for item_image in items_images),
+            _process_nvidia_image(charges_image, "Charges Image"),
+        )
 
         full_items_text = "\n\n".join(items_texts)
         full_text = f"ITEMS:\n{full_items_text}\n\nCHARGES:\n{charges_text}"
@@ -378,9 +416,9 @@ async def extract_text_nvidia(
                 "response": charges_llm_result["response"]
             }
 
-        return JSONResponse(response_body)
+        return ORJSONResponse(response_body)
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500,
             detail=f"Nvidia API request failed: {str(e)}"
@@ -0,0 +1,134 @@
+"""
+Keyword rules for Ontario HST taxability, used before (and instead of) the LLM.
+"""
+
+import re
+from typing import Optional
+
+import ahocorasick
+
+from ocr.instructions import ALWAYS_TAXABLE, NON_FOOD_OBJECTS
+
+# Substring heuristics for the local pre-classifier and the no-LLM fallback. These are
+# deliberately not the NON_TAXABLE_KEYWORDS / TAXABLE_KEYWORDS prompt hints in
+# ocr.instructions: those are whole-word hints for the LLM, and short entries there
+# ("ice", "pen", "soft") would misfire as substrings ("rice", "pepper", "softener").
+
+# Non-taxable keywords (basic groceries)
+SIMPLE_RULE_NON_TAXABLE_KEYWORDS = (
+    'banana', 'apple', 'orange', 'grape', 'berry', 'fruit',
+    'milk', 'egg', 'butter', 'cheese', 'yogurt', 'cream',
+    'bread', 'bun', 'bagel', 'pita',
+    'rice', 'flour', 'pasta', 'grain', 'oat', 'cereal',
+    'chicken', 'beef', 'pork', 'fish', 'meat', 'turkey',
+    'carrot', 'lettuce', 'tomato', 'potato', 'onion', 'vegetable',
+    'coffee', 'tea',
+    'organic', 'fresh', 'selection'  # Store brand indicators
+)
+
+# Taxable keywords
+SIMPLE_RULE_TAXABLE_KEYWORDS = (
+    'chip', 'candy', 'chocolate', 'cookie', 'pastry', 'cake',
+    'soda', 'pop', 'juice drink', 'energy drink',
+    'alcohol', 'beer', 'wine', 'spirit',
+    'prepared', 'ready to eat', 'sandwich', 'salad',
+    'cleaning', 'soap', 'detergent', 'shampoo',
+    'paper towel', 'tissue', 'toilet paper'
+)
+
+# Grocery words too loose to settle an item ("Coffee Maker", "Shaving Cream", "Organic Cotton Pads")
+WEAK_NON_TAXABLE_KEYWORDS = frozenset({
+    'organic', 'fresh', 'selection',
+    'tea', 'coffee', 'cream', 'fruit', 'oat',
+})
+
+# Taxable words that also name groceries ("Baking Soda", "Red Wine Vinegar", "Rice Cakes",
+# "Salad Dressing", "Prepared Mustard", "Pastry Flour")
+WEAK_TAXABLE_KEYWORDS = frozenset({
+    'soda', 'pop', 'wine', 'spirit', 'cake', 'pastry', 'salad', 'prepared',
+})
+
+# Any of these as a word means the item is not food, whatever food words sit next to it
+NON_FOOD_WORDS = ALWAYS_TAXABLE | NON_FOOD_OBJECTS
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """One Aho-Corasick automaton over both keyword lists, each keyword tagged with its taxable verdict"""
+    automaton = ahocorasick.Automaton()
+    for keyword in SIMPLE_RULE_NON_TAXABLE_KEYWORDS:
+        automaton.add_word(keyword, (keyword, False))
+    # Added last so a keyword in both lists stays taxable
+    for keyword in SIMPLE_RULE_TAXABLE_KEYWORDS:
+        automaton.add_word(keyword, (keyword, True))
+    automaton.make_automaton()
+    return automaton
+
+
+# Single linear scan per item name, independent of the number of keywords
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def _word_end(text: str, start: int, end: int) -> Optional[int]:
+    """End of the word when text[start:end] is a whole word (allowing a plural 's'), else None"""
+    if start > 0 and text[start - 1].isalnum():
+        return None
+    if end < len(text) and text[end] == 's':
+        end += 1
+    if end < len(text) and text[end].isalnum():
+        return None
+    return end
+
+
+def _is_non_food_word(word: str) -> bool:
+    return word in NON_FOOD_WORDS or (word.endswith('s') and word[:-1] in NON_FOOD_WORDS)
+
+
+def match_simple_rules(item_name: str) -> Optional[bool]:
+    """
+    Confident keyword verdict for an item, None when the LLM should decide.
+
+    True when a word is in ALWAYS_TAXABLE / NON_FOOD_OBJECTS, or a strong taxable
+    keyword matches as a whole word. False only when every keyword hit is a
+    whole-word, non-weak grocery keyword and one of them is the item's head noun
+    (its last word, ignoring sizes like "2L"), so "Egg Timer" or "Cheese Puffs"
+    stay undecided.
+    """
+    item_lower = item_name.lower()
+    words = list(_WORD_RE.finditer(item_lower))
+    if any(_is_non_food_word(word.group()) for word in words):
+        return True
+
+    grocery_ends = set()
+    confident_grocery = True
+    for end, (keyword, taxable) in _KEYWORD_AUTOMATON.iter(item_lower):
+        word_end = _word_end(item_lower, end + 1 - len(keyword), end + 1)
+        if taxable:
+            if word_end is not None and keyword not in WEAK_TAXABLE_KEYWORDS:
+                return True
+            # Any taxable signal, even a loose one, rules out a confident False
+            confident_grocery = False
+        elif word_end is None or keyword in WEAK_NON_TAXABLE_KEYWORDS:
+            confident_grocery = False
+        else:
+            grocery_ends.add(word_end)
+
+    if not confident_grocery or not grocery_ends:
+        return None
+
+    head = next((word for word in reversed(words) if word.group().isalpha() and len(word.group()) > 2), None)
+    if head is not None and head.end() in grocery_ends:
+        return False
+    return None
+
+
+def classify_item_simple_rules(item_name: str) -> bool:
+    """
+    Simple rule-based classification without LLM.
+
+    Returns:
+        True if taxable, False if non-taxable
+    """
+    # Any taxable keyword wins; everything else defaults to non-taxable (Ontario default)
+    return any(taxable for _, (_, taxable) in _KEYWORD_AUTOMATON.iter(item_name.lower()))
@@ -1,14 +1,16 @@
 """
 API endpoint to move receipts between folders
 """
-from datetime import datetime
+import asyncio
 from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from pymongo import ReturnDocument
 from models import UserInDB, GroupResponse
 from auth_routes import get_current_user
 from database import get_groups_collection, get_folders_collection
-from groups_routes import serialize_group, find_member
+from groups_routes import GROUP_RESPONSE_PROJECTION, group_etag, serialize_group
 
 router = APIRouter(prefix="/receipts", tags=["Receipts"])
 
@@ -17,7 +19,11 @@ class MoveReceiptPayload(BaseModel):
     folder_id: str | None
 
 
-@router.patch("/{receipt_id}/move", response_model=GroupResponse)
+async def _no_folder():
+    return None
+
+
+@router.patch("/{receipt_id}/move", response_model=GroupResponse, response_class=ORJSONResponse)
 async def move_receipt(
     receipt_id: str,
     payload: MoveReceiptPayload,
@@ -26,32 +32,52 @@ async def move_receipt(
     groups_collection = await get_groups_collection()
     folders_collection = await get_folders_collection()
 
-    try:
-        receipt = await groups_collection.find_one({"_id": ObjectId(receipt_id)})
-    except Exception:
+    if not ObjectId.is_valid(receipt_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid receipt id")
+    oid = ObjectId(receipt_id)
+
+    folder_oid = None
+    if payload.folder_id:
+        if not ObjectId.is_valid(payload.folder_id):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid folder id")
+        folder_oid = ObjectId(payload.folder_id)
 
-    if not receipt or not find_member(receipt["members"], current_user.email):
+    # Receipt and folder lookups are independent, so run them concurrently.
+    # Membership is checked in the filter and only the fields the checks need are fetched.
+    receipt, folder = await asyncio.gather(
+        groups_collection.find_one(
+            {"_id": oid, "members.email": current_user.email}, projection={"_id": 1}
+        ),
+        folders_collection.find_one(
+            {"_id": folder_oid}, projection={"created_by": 1}
+        ) if folder_oid else _no_folder(),
+    )
+
+    if not receipt:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt not found")
 
     # Verify folder exists if folder_id is provided
     if payload.folder_id:
-        try:
-            folder = await folders_collection.find_one({"_id": ObjectId(payload.folder_id)})
-        except Exception:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid folder id")
-
         if not folder or folder["created_by"] != current_user.email:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Folder not found"
             )
 
-    # Update receipt folder_id
-    now = datetime.utcnow()
-    await groups_collection.update_one(
-        {"_id": ObjectId(receipt_id)},
-        {"$set": {"folder_id": payload.folder_id, "updated_at": now}},
+    # Update receipt folder_id and read back the updated document in the same round trip
+    # Pipeline update so MongoDB stamps updated_at with its own clock ($$NOW);
+    # $literal keeps a client-supplied id from being read as a field path
+    updated_receipt = await groups_collection.find_one_and_update(
+        {"_id": oid, "members.email": current_user.email},
+        [{"$set": {"folder_id": {"$literal": payload.folder_id}, "updated_at": "$$NOW"}}],
+        projection=GROUP_RESPONSE_PROJECTION,
+        return_document=ReturnDocument.AFTER,
     )
+    if not updated_receipt:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt not found")
 
-    updated_receipt = await groups_collection.find_one({"_id": ObjectId(receipt_id)})
-    return GroupResponse(**serialize_group(updated_receipt))
+    # Trusted DB document: serialize the dict with orjson directly (response_model only documents it).
+    # Same ETag as GET /groups/{id}, so the client's next GET can revalidate with a 304
+    return ORJSONResponse(
+        serialize_group(updated_receipt),
+        headers={"ETag": group_etag(updated_receipt)},
+    )